@@ -4,7 +4,10 @@ from datetime import datetime
 import google.generativeai as genai
 from googleapiclient.discovery import build
 from dotenv import load_dotenv
+import httplib2
 import time
+from offline import CircuitBreaker, SnapshotBundle, SnapshotRecorder, admin_token_matches
+from cache import ResponseCache, create_backend
 
 # Set page config
 st.set_page_config(
@@ -21,6 +24,20 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
+# Offline degraded mode settings
+SNAPSHOT_PATH = os.getenv("MEDIAI_SNAPSHOT_PATH", "mediai_snapshot.bin")
+SNAPSHOT_SIZE = int(os.getenv("MEDIAI_SNAPSHOT_SIZE", "200"))
+REQUEST_TIMEOUT = float(os.getenv("MEDIAI_REQUEST_TIMEOUT", "10"))
+LATENCY_LIMIT = float(os.getenv("MEDIAI_LATENCY_LIMIT", "8"))
+FAILURE_THRESHOLD = int(os.getenv("MEDIAI_FAILURE_THRESHOLD", "3"))
+RECOVERY_TIMEOUT = float(os.getenv("MEDIAI_RECOVERY_TIMEOUT", "30"))
+# Snapshot export is only offered when the app is opened with ?admin=<MEDIAI_ADMIN_TOKEN>
+ADMIN_TOKEN = os.getenv("MEDIAI_ADMIN_TOKEN")
+
+# Shared response cache: memory://, sqlite:///mediai_cache.db or redis://host:6379/0
+CACHE_URL = os.getenv("MEDIAI_CACHE_URL", "memory://")
+CACHE_TTL = int(os.getenv("MEDIAI_CACHE_TTL", "86400"))
+
 if not all([GEMINI_API_KEY, YOUTUBE_API_KEY]):
     st.error("Required API keys not found. Please check your .env file.")
     st.stop()
@@ -28,11 +45,38 @@ if not all([GEMINI_API_KEY, YOUTUBE_API_KEY]):
 # Initialize APIs
 genai.configure(api_key=GEMINI_API_KEY)
 model = genai.GenerativeModel("gemini-1.5-pro")
-youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY, http=httplib2.Http(timeout=REQUEST_TIMEOUT))
+
+@st.cache_resource
+def load_snapshot():
+    """Load the offline snapshot bundle once per server process."""
+    return SnapshotBundle.open(SNAPSHOT_PATH)
+
+@st.cache_resource
+def get_snapshot_recorder():
+    """Share one recorder of live responses across all sessions."""
+    return SnapshotRecorder(SNAPSHOT_SIZE)
+
+@st.cache_resource
+def get_circuit_breakers():
+    """Share one circuit breaker per upstream API across all sessions."""
+    return {
+        name: CircuitBreaker(FAILURE_THRESHOLD, LATENCY_LIMIT, RECOVERY_TIMEOUT)
+        for name in ("gemini", "youtube")
+    }
+
+@st.cache_resource
+def get_response_cache():
+    """Connect to the response cache backend shared by all sessions and replicas."""
+    return ResponseCache(create_backend(CACHE_URL), ttl=CACHE_TTL)
 
 class MediAIAssistant:
     def __init__(self):
         self.create_custom_css()
+        self.snapshot = load_snapshot()
+        self.recorder = get_snapshot_recorder()
+        self.breakers = get_circuit_breakers()
+        self.cache = get_response_cache()
         if 'page' not in st.session_state:
             st.session_state.page = 'home'
         if 'show_first_aid_kit' not in st.session_state:
@@ -249,7 +293,7 @@ class MediAIAssistant:
         - [Additional important information]
         - [Interactions with other medications if any]
         """
-        return self.safe_generate_content(prompt)
+        return self.safe_generate_content(prompt, "analyze_medicine", medicine_name)
 
     def analyze_symptoms(self, symptoms):
         """Generate natural remedy recommendations using AI."""
@@ -289,7 +333,7 @@ class MediAIAssistant:
         **When to See a Doctor:**
         [List specific symptoms or conditions that require professional medical attention]
         """
-        return self.safe_generate_content(prompt)
+        return self.safe_generate_content(prompt, "analyze_symptoms", symptoms)
 
     def analyze_emergency(self, emergency_type):
         """Generate emergency response guidance using AI."""
@@ -312,41 +356,28 @@ class MediAIAssistant:
         **Additional Notes:**
         [Important information about when to seek immediate medical attention]
         """
-        return self.safe_generate_content(prompt)
+        return self.safe_generate_content(prompt, "analyze_emergency", emergency_type)
 
     def get_emergency_videos(self, emergency_type):
         """Fetch relevant emergency first aid videos from YouTube."""
-        try:
-            search_query = f"first aid {emergency_type} emergency treatment tutorial medical"
-            request = youtube.search().list(
-                part="snippet",
-                q=search_query,
-                type="video",
-                videoEmbeddable="true",
-                maxResults=3,
-                relevanceLanguage="en",
-                safeSearch="strict"
-            )
-            response = request.execute()
-            
-            videos = []
-            for item in response['items']:
-                video = {
-                    'title': item['snippet']['title'],
-                    'video_id': item['id']['videoId'],
-                    'thumbnail': item['snippet']['thumbnails']['medium']['url'],
-                    'description': item['snippet']['description']
-                }
-                videos.append(video)
-            return videos
-        except Exception as e:
-            st.error(f"Error fetching videos: {e}")
-            return []
+        search_query = f"first aid {emergency_type} emergency treatment tutorial medical"
+        return self.search_videos(search_query, "emergency_videos", emergency_type)
 
     def get_remedy_videos(self, remedy_name):
         """Fetch relevant natural remedy preparation videos from YouTube."""
+        search_query = f"how to prepare {remedy_name} natural remedy home remedies tutorial"
+        return self.search_videos(search_query, "remedy_videos", remedy_name)
+
+    def search_videos(self, search_query, kind, query):
+        """Search YouTube through the shared cache, falling back to the offline snapshot when YouTube is unavailable."""
+        cached_videos = self.cache.get(kind, query)
+        if cached_videos:
+            self.recorder.record(kind, query, cached_videos)
+            return cached_videos
+        breaker = self.breakers["youtube"]
+        if not breaker.allow():
+            return self.snapshot.get(kind, query) or []
         try:
-            search_query = f"how to prepare {remedy_name} natural remedy home remedies tutorial"
             request = youtube.search().list(
                 part="snippet",
                 q=search_query,
@@ -356,7 +387,7 @@ class MediAIAssistant:
                 relevanceLanguage="en",
                 safeSearch="strict"
             )
-            response = request.execute()
+            response = breaker.call(request.execute)
             
             videos = []
             for item in response['items']:
@@ -367,13 +398,31 @@ class MediAIAssistant:
                     'description': item['snippet']['description']
                 }
                 videos.append(video)
+            self.cache.set(kind, query, videos)
+            self.recorder.record(kind, query, videos)
             return videos
         except Exception as e:
+            cached = self.snapshot.get(kind, query)
+            if cached:
+                return cached
             st.error(f"Error fetching videos: {e}")
             return []
 
-    def safe_generate_content(self, prompt):
-        """Generate AI content safely with loading animation."""
+    def safe_generate_content(self, prompt, kind=None, query=None):
+        """Generate AI content safely with loading animation, serving the offline snapshot when Gemini is down."""
+        if kind:
+            cached_response = self.cache.get(kind, query)
+            if cached_response:
+                self.recorder.record(kind, query, cached_response)
+                return cached_response
+        breaker = self.breakers["gemini"]
+        cached = self.snapshot.get(kind, query) if kind else None
+        if not breaker.allow():
+            if cached:
+                st.info("📦 MediAI is in offline mode. Showing a saved response.")
+                return cached
+            st.error("MediAI is temporarily unavailable. Please try again shortly.")
+            return None
         try:
             with st.spinner(''):
                 st.markdown("""
@@ -382,10 +431,18 @@ class MediAIAssistant:
                         <span>Processing with MediAI...</span>
                     </div>
                 """, unsafe_allow_html=True)
-                response = model.generate_content(prompt)
+                response = breaker.call(
+                    model.generate_content, prompt, request_options={"timeout": REQUEST_TIMEOUT}
+                )
+                if kind:
+                    self.cache.set(kind, query, response.text)
+                    self.recorder.record(kind, query, response.text)
                 time.sleep(0.8)  # Smooth transition
                 return response.text
         except Exception as e:
+            if cached:
+                st.info("📦 MediAI is in offline mode. Showing a saved response.")
+                return cached
             st.error(f"Error generating content: {e}")
             return None
 
@@ -650,6 +707,31 @@ class MediAIAssistant:
             st.session_state.show_first_aid_kit = not st.session_state.show_first_aid_kit
             st.rerun()
 
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("### 📦 Offline Snapshot")
+        if any(breaker.state != CircuitBreaker.CLOSED for breaker in self.breakers.values()):
+            st.sidebar.warning("Offline mode: serving saved responses until MediAI services recover.")
+        st.sidebar.caption(f"{len(self.snapshot)} saved responses loaded")
+        if self.is_admin():
+            self.render_snapshot_export()
+
+    def is_admin(self):
+        """Check the admin query parameter against MEDIAI_ADMIN_TOKEN."""
+        return admin_token_matches(st.query_params.get("admin", ""), ADMIN_TOKEN)
+
+    def render_snapshot_export(self):
+        """Render the operator-only snapshot export, building the bundle only on request."""
+        if st.sidebar.button("Prepare Offline Snapshot", key="sidebar_snapshot_prepare"):
+            st.session_state.snapshot_export = self.recorder.export(self.snapshot)
+        if st.session_state.get('snapshot_export'):
+            st.sidebar.download_button(
+                "Download Offline Snapshot",
+                data=st.session_state.snapshot_export,
+                file_name=os.path.basename(SNAPSHOT_PATH),
+                mime="application/octet-stream",
+                key="sidebar_snapshot"
+            )
+
     def render_footer(self):
         """Render the application footer."""
         st.markdown("""
@@ -0,0 +1,134 @@
+"""Benchmark cache hit latency per backend with several concurrent processes.
+
+Usage: python bench_cache.py [--processes 4] [--ops 2000] [--redis-url redis://host:6379/0]
+
+Without --redis-url the Redis backend runs against redis_stub.LocalRedisServer,
+a small in-process stand-in that speaks enough RESP for the app's cache.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import statistics
+import tempfile
+import time
+
+from cache import ResponseCache, create_backend
+from redis_stub import LocalRedisServer
+
+SAMPLE_RESPONSE = (
+    "**Immediate Steps to Take:**\n"
+    + "\n".join(f"{i}. Keep the person calm and follow step {i} carefully." for i in range(1, 6))
+    + "\n\n**Warning Signs to Watch For:**\n- Difficulty breathing\n- Loss of consciousness\n"
+)
+SAMPLE_VIDEOS = [
+    {
+        "title": f"First aid tutorial {i}",
+        "video_id": f"video{i:05d}",
+        "thumbnail": f"https://i.ytimg.com/vi/video{i:05d}/mqdefault.jpg",
+        "description": "Step-by-step first aid instructions from a certified trainer.",
+    }
+    for i in range(3)
+]
+
+
+def populate(cache, keys):
+    for i in range(keys):
+        cache.set("analyze_emergency", f"emergency {i}", SAMPLE_RESPONSE)
+        cache.set("emergency_videos", f"emergency {i}", SAMPLE_VIDEOS)
+
+
+def worker(url, keys, ops, populate_first, results):
+    # Report failures through the queue so the parent never waits on a dead worker.
+    try:
+        cache = ResponseCache(create_backend(url))
+        if populate_first:
+            populate(cache, keys)
+        timings = []
+        for op in range(ops):
+            kind = "analyze_emergency" if op % 2 == 0 else "emergency_videos"
+            start = time.perf_counter()
+            value = cache.get(kind, f"emergency {op % keys}")
+            timings.append(time.perf_counter() - start)
+            if value is None:
+                raise RuntimeError(f"unexpected cache miss on {url}")
+        cache.backend.close()
+        results.put((None, timings))
+    except Exception as e:
+        results.put((f"{type(e).__name__}: {e}", None))
+
+
+def collect(results, workers, timeout):
+    timings = []
+    for _ in workers:
+        try:
+            error, worker_timings = results.get(timeout=timeout)
+        except queue.Empty:
+            crashed = [p.exitcode for p in workers if p.exitcode not in (None, 0)]
+            raise RuntimeError(f"timed out waiting for workers (exit codes: {crashed})")
+        if error:
+            raise RuntimeError(error)
+        timings.extend(worker_timings)
+    return timings
+
+
+def run(name, url, processes, keys, ops, timeout=120):
+    # The memory backend is private to each process, so every worker warms its own copy.
+    per_process = url.startswith("memory")
+    if not per_process:
+        populate(ResponseCache(create_backend(url)), keys)
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=worker, args=(url, keys, ops, per_process, results))
+        for _ in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    try:
+        timings = collect(results, workers, timeout)
+    finally:
+        for process in workers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+    timings.sort()
+    print(
+        f"{name:<8} {len(timings):>8} "
+        f"{statistics.mean(timings) * 1e6:>10.1f} "
+        f"{timings[len(timings) // 2] * 1e6:>10.1f} "
+        f"{timings[int(len(timings) * 0.99)] * 1e6:>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--ops", type=int, default=2000, help="cache hits per process")
+    parser.add_argument("--redis-url", help="benchmark a real Redis server instead of the stand-in")
+    args = parser.parse_args()
+
+    server = None
+    redis_url = args.redis_url
+    if not redis_url:
+        server = LocalRedisServer().start()
+        redis_url = server.url
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            ("memory", "memory://"),
+            ("sqlite", f"sqlite:///{os.path.join(tmp, 'bench.db')}"),
+            ("redis", redis_url),
+        ]
+        print(f"{args.processes} processes x {args.ops} hits, {args.keys} keys per kind")
+        print(f"{'backend':<8} {'hits':>8} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+        try:
+            for name, url in backends:
+                run(name, url, args.processes, args.keys, args.ops)
+        finally:
+            if server is not None:
+                server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import hashlib
+import itertools
+import json
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import unquote, urlparse
+
+from offline import CircuitBreaker, snapshot_key
+
+
+def encode(value):
+    """Serialize a JSON-compatible value as zlib-compressed JSON."""
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def decode(data):
+    """Inverse of encode()."""
+    return json.loads(zlib.decompress(data))
+
+
+class RedisError(Exception):
+    """Error reply returned by a Redis-compatible server."""
+
+
+class CacheBackend(ABC):
+    """Byte-oriented key/value store shared by the app's response cache."""
+
+    @abstractmethod
+    def get(self, key):
+        """Return the stored bytes for key, or None on a miss or expired entry."""
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        """Store bytes under key, expiring after ttl seconds if given."""
+
+    def close(self):
+        pass
+
+
+class ConnectionPool:
+    """Small lock-protected pool of connections shared by every script thread."""
+
+    def __init__(self, connect, disconnect, size=8):
+        self.connect = connect
+        self.disconnect = disconnect
+        self.size = size
+        self.lock = threading.Lock()
+        self.idle = []
+
+    def acquire(self):
+        """Return (connection, reused) using an idle connection when one is available."""
+        with self.lock:
+            if self.idle:
+                return self.idle.pop(), True
+        return self.connect(), False
+
+    def release(self, conn):
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append(conn)
+                return
+        self.discard(conn)
+
+    def discard(self, conn):
+        try:
+            self.disconnect(conn)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            self.discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Lend a connection, dropping it instead of returning it to the pool if the caller fails."""
+        conn, _ = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            self.discard(conn)
+            raise
+        self.release(conn)
+
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU cache; fast, but not shared between replicas."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class SQLiteCache(CacheBackend):
+    """SQLite cache in WAL mode, shared by every process on the same host."""
+
+    def __init__(self, path, purge_every=100):
+        self.path = path
+        self.purge_every = purge_every
+        # itertools.count is advanced atomically, so concurrent script threads never lose a write.
+        self.writes = itertools.count(1)
+        self.pool = ConnectionPool(self._open, lambda conn: conn.close())
+        with self.pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+            )
+
+    def _open(self):
+        # Pooled connections move between Streamlit script threads, so allow cross-thread use.
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key):
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires = now + ttl if ttl else None
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(value), expires),
+            )
+            if next(self.writes) % self.purge_every == 0:
+                conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+
+    def close(self):
+        self.pool.clear()
+
+
+class RedisCache(CacheBackend):
+    """Minimal RESP client for a Redis-compatible server shared by all replicas."""
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, timeout=0.2):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.pool = ConnectionPool(self._open, self._disconnect)
+
+    def _open(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        try:
+            if self.password:
+                self._execute(conn, ("AUTH", self.password))
+            if self.db:
+                self._execute(conn, ("SELECT", self.db))
+        except BaseException:
+            self._disconnect(conn)
+            raise
+        return conn
+
+    @staticmethod
+    def _disconnect(conn):
+        conn[1].close()
+        conn[0].close()
+
+    def _execute(self, conn, args):
+        sock, reader = conn
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        sock.sendall(b"".join(parts))
+        return self._read_reply(reader)
+
+    def _command(self, *args):
+        for attempt in range(2):
+            conn, reused = self.pool.acquire()
+            try:
+                reply = self._execute(conn, args)
+            except RedisError:
+                self.pool.release(conn)
+                raise
+            except OSError:
+                self.pool.discard(conn)
+                # Idle pooled connections may have been closed by the server; retry once on a fresh one.
+                if reused and attempt == 0:
+                    self.pool.clear()
+                    continue
+                raise
+            except BaseException:
+                # Anything else (e.g. a malformed reply) leaves the stream out of sync.
+                self.pool.discard(conn)
+                raise
+            self.pool.release(conn)
+            return reply
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            raise RedisError(body.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return reader.read(length + 2)[:-2]
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [self._read_reply(reader) for _ in range(length)]
+        raise ConnectionError(f"Unexpected Redis reply: {line!r}")
+
+    def get(self, key):
+        return self._command("GET", key)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self._command("SET", key, value, "EX", int(ttl))
+        else:
+            self._command("SET", key, value)
+
+    def close(self):
+        self.pool.clear()
+
+
+def create_backend(url):
+    """Build a backend from a URL: memory://, sqlite:///path/to.db or redis://[:password@]host:port/db."""
+    parsed = urlparse(url or "memory://")
+    if parsed.scheme == "memory":
+        return MemoryCache()
+    if parsed.scheme == "sqlite":
+        # sqlite:///relative.db or sqlite:////absolute/path.db, as in SQLAlchemy.
+        return SQLiteCache(parsed.path[1:] or "mediai_cache.db")
+    if parsed.scheme == "redis":
+        db = parsed.path.lstrip("/")
+        return RedisCache(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+        )
+    raise ValueError(f"Unsupported cache backend: {url}")
+
+
+class ResponseCache:
+    """Cache of LLM responses and video results keyed by request kind and query."""
+
+    def __init__(self, backend, ttl=None, namespace="mediai", breaker=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.namespace = namespace
+        # An unreachable backend is skipped entirely until it recovers, so pages never wait on it.
+        self.breaker = breaker or CircuitBreaker(failure_threshold=3, latency_limit=0.5, reset_timeout=30)
+
+    def key(self, kind, query):
+        digest = hashlib.sha1(snapshot_key(kind, query).encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{kind}:{digest}"
+
+    def get(self, kind, query):
+        """Return the cached value, or None on a miss or if the backend is unavailable."""
+        if not self.breaker.allow():
+            return None
+        try:
+            data = self.breaker.call(self.backend.get, self.key(kind, query))
+            return decode(data) if data is not None else None
+        except (OSError, sqlite3.Error, RedisError, zlib.error, ValueError):
+            return None
+
+    def set(self, kind, query, value):
+        """Store a value; backend failures are ignored so caching never breaks a page."""
+        if not value or not self.breaker.allow():
+            return
+        try:
+            self.breaker.call(self.backend.set, self.key(kind, query), encode(value), self.ttl)
+        except (OSError, sqlite3.Error, RedisError):
+            pass
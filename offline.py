@@ -0,0 +1,217 @@
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+
+# Bundle layout: MAGIC | index length (uint64 LE) | zlib(JSON index) | zlib(JSON payload)...
+# The index maps each key to the [offset, length] of its payload relative to the end
+# of the index, so entries are decompressed out of the memory map only on request.
+MAGIC = b"MAISNAP1"
+HEADER = struct.Struct("<Q")
+
+
+def snapshot_key(kind, query):
+    """Build the normalized lookup key for a request kind and user query."""
+    return f"{kind}\x00{' '.join(str(query).lower().split())}"
+
+
+def admin_token_matches(token, expected):
+    """Compare a visitor-supplied token with the configured admin token in constant time."""
+    if not expected or not isinstance(token, str):
+        return False
+    return hmac.compare_digest(
+        token.encode("utf-8", "surrogatepass"), expected.encode("utf-8", "surrogatepass")
+    )
+
+
+class SnapshotBundle:
+    """Read-only, memory-mapped bundle of cached AI responses and video results."""
+
+    def __init__(self, index=None, buffer=None, data_start=0, path=None):
+        self.index = index or {}
+        self.buffer = buffer
+        self.data_start = data_start
+        self.path = path
+
+    @classmethod
+    def open(cls, path):
+        """Load a bundle from disk, returning an empty bundle if it is missing or invalid."""
+        if not path or not os.path.exists(path) or os.path.getsize(path) == 0:
+            return cls(path=path)
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if buffer[:len(MAGIC)] != MAGIC:
+                raise ValueError("not a MediAI snapshot bundle")
+            start = len(MAGIC) + HEADER.size
+            (index_length,) = HEADER.unpack_from(buffer, len(MAGIC))
+            index = json.loads(zlib.decompress(buffer[start:start + index_length]))
+            data_start = start + index_length
+            # Reject malformed or truncated files up front rather than failing on first lookup.
+            if not isinstance(index, dict):
+                raise ValueError("snapshot index is not a mapping")
+            for entry in index.values():
+                if (
+                    not isinstance(entry, list)
+                    or len(entry) != 2
+                    or not all(type(value) is int for value in entry)
+                ):
+                    raise ValueError("snapshot index entry is malformed")
+                offset, length = entry
+                if offset < 0 or length < 0 or data_start + offset + length > len(buffer):
+                    raise ValueError("snapshot bundle is truncated")
+            return cls(index=index, buffer=buffer, data_start=data_start, path=path)
+        except (OSError, ValueError, TypeError, struct.error, zlib.error):
+            return cls(path=path)
+
+    @staticmethod
+    def dumps(entries):
+        """Serialize a mapping of key -> JSON-compatible value into bundle bytes."""
+        index = {}
+        chunks = []
+        offset = 0
+        for key, value in entries.items():
+            chunk = zlib.compress(json.dumps(value).encode("utf-8"), 9)
+            index[key] = [offset, len(chunk)]
+            chunks.append(chunk)
+            offset += len(chunk)
+        header = zlib.compress(json.dumps(index).encode("utf-8"), 9)
+        return MAGIC + HEADER.pack(len(header)) + header + b"".join(chunks)
+
+    def _read(self, offset, length):
+        """Decode one payload, returning None if it is corrupt."""
+        start = self.data_start + offset
+        try:
+            return json.loads(zlib.decompress(self.buffer[start:start + length]))
+        except (ValueError, TypeError, zlib.error):
+            return None
+
+    def get(self, kind, query):
+        """Return the cached value for a request, or None if it is missing or corrupt."""
+        entry = self.index.get(snapshot_key(kind, query))
+        if entry is None or self.buffer is None:
+            return None
+        return self._read(*entry)
+
+    def items(self):
+        """Yield every readable (key, value) pair stored in the bundle."""
+        if self.buffer is None:
+            return
+        for key, (offset, length) in self.index.items():
+            value = self._read(offset, length)
+            if value is not None:
+                yield key, value
+
+    def __len__(self):
+        return len(self.index)
+
+
+class SnapshotRecorder:
+    """Track live responses and request counts so the busiest ones can be exported."""
+
+    def __init__(self, limit=200):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.values = {}
+
+    def record(self, kind, query, value):
+        """Store the latest successful value for a request and bump its count."""
+        if not value:
+            return
+        key = snapshot_key(kind, query)
+        with self.lock:
+            self.counts[key] += 1
+            self.values[key] = value
+            # Trim in batches so memory stays bounded without sorting on every call.
+            if len(self.counts) > 2 * self.limit:
+                self.counts = Counter(dict(self.counts.most_common(self.limit)))
+                self.values = {key: self.values[key] for key in self.counts}
+
+    def export(self, base=None):
+        """Build bundle bytes from the most-requested entries, topped up from a base bundle."""
+        with self.lock:
+            entries = {key: self.values[key] for key, _ in self.counts.most_common(self.limit)}
+        if base is not None:
+            for key, value in base.items():
+                if len(entries) >= self.limit:
+                    break
+                entries.setdefault(key, value)
+        return SnapshotBundle.dumps(entries)
+
+
+class CircuitBreaker:
+    """Trip after repeated failures or slow calls, then reject calls until a cool-down passes."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=3, latency_limit=8.0, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.latency_limit = latency_limit
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started = None
+
+    @property
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Return True if a call may go upstream; only one trial call runs while half-open."""
+        with self.lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN:
+                # A trial that never reported back expires, so the breaker cannot stick open.
+                now = time.monotonic()
+                if self.trial_started is None or now - self.trial_started >= self.reset_timeout:
+                    self.trial_started = now
+                    return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_started = None
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        """Run func, counting exceptions and calls slower than latency_limit as failures."""
+        start = time.monotonic()
+        completed = False
+        try:
+            result = func(*args, **kwargs)
+            completed = True
+        finally:
+            if not completed:
+                self.record_failure()
+        if time.monotonic() - start > self.latency_limit:
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
@@ -0,0 +1,95 @@
+import socket
+import socketserver
+import threading
+import time
+
+
+class RESPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.track(self.connection)
+        try:
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int(self.rfile.readline()[1:-2])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                self.wfile.write(self.server.dispatch(args))
+                self.wfile.flush()
+        except OSError:
+            return
+        finally:
+            self.server.untrack(self.connection)
+
+
+class LocalRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded stand-in for a Redis server speaking enough RESP for RedisCache."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), RESPHandler)
+        self.store = {}
+        self.lock = threading.Lock()
+        self.clients = set()
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.drop_connections()
+        self.server_close()
+
+    def track(self, conn):
+        with self.lock:
+            self.clients.add(conn)
+
+    def untrack(self, conn):
+        with self.lock:
+            self.clients.discard(conn)
+
+    def drop_connections(self):
+        """Close every client connection, as a restarted server would."""
+        with self.lock:
+            clients, self.clients = self.clients, set()
+        for conn in clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def dispatch(self, args):
+        command = args[0].upper()
+        with self.lock:
+            if command == b"GET":
+                entry = self.store.get(args[1])
+                if entry is not None and entry[1] is not None and entry[1] < time.time():
+                    del self.store[args[1]]
+                    entry = None
+                if entry is None:
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+            if command == b"SET":
+                expires = None
+                if len(args) >= 5 and args[3].upper() == b"EX":
+                    expires = time.time() + int(args[4])
+                self.store[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            if command == b"DEL":
+                removed = sum(self.store.pop(key, None) is not None for key in args[1:])
+                return b":%d\r\n" % removed
+        if command == b"PING":
+            return b"+PONG\r\n"
+        if command in (b"SELECT", b"AUTH"):
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
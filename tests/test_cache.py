@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+
+from cache import (
+    CacheBackend,
+    MemoryCache,
+    RedisCache,
+    ResponseCache,
+    SQLiteCache,
+    create_backend,
+)
+from redis_stub import LocalRedisServer
+
+
+@pytest.fixture
+def redis_server():
+    server = LocalRedisServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryCache()
+    elif request.param == "sqlite":
+        backend = SQLiteCache(str(tmp_path / "cache.db"))
+    else:
+        backend = create_backend(request.getfixturevalue("redis_server").url)
+    yield backend
+    backend.close()
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_round_trip(backend):
+    assert backend.get("missing") is None
+    backend.set("key", b"\x00value\r\n")
+    assert backend.get("key") == b"\x00value\r\n"
+    backend.set("key", b"updated")
+    assert backend.get("key") == b"updated"
+
+
+def test_ttl_expiry(backend):
+    backend.set("short", b"gone", ttl=1)
+    backend.set("forever", b"kept")
+    assert backend.get("short") == b"gone"
+    time.sleep(1.1)
+    assert backend.get("short") is None
+    assert backend.get("forever") == b"kept"
+
+
+def test_memory_cache_evicts_least_recently_used():
+    backend = MemoryCache(max_entries=2)
+    backend.set("a", b"1")
+    backend.set("b", b"2")
+    backend.get("a")
+    backend.set("c", b"3")
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+
+def test_sqlite_purges_expired_rows(tmp_path):
+    backend = SQLiteCache(str(tmp_path / "cache.db"), purge_every=10)
+    for i in range(10):
+        backend.set(f"old {i}", b"x", ttl=1)
+    time.sleep(1.1)
+    for i in range(10):
+        backend.set(f"new {i}", b"x", ttl=60)
+    with backend.pool.connection() as conn:
+        (rows,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+    assert rows == 10
+
+
+def test_sqlite_reuses_pooled_connection(tmp_path):
+    backend = SQLiteCache(str(tmp_path / "cache.db"))
+    backend.set("key", b"value")
+    backend.get("key")
+    assert len(backend.pool.idle) == 1
+
+
+def test_redis_reconnects_after_server_drops(redis_server):
+    backend = create_backend(redis_server.url)
+    backend.set("key", b"value")
+    redis_server.drop_connections()
+    assert backend.get("key") == b"value"
+    assert len(backend.pool.idle) == 1
+
+
+def test_redis_malformed_reply_discards_connection(redis_server, monkeypatch):
+    backend = create_backend(redis_server.url)
+    backend.set("key", b"value")
+    assert len(backend.pool.idle) == 1
+    monkeypatch.setattr(redis_server, "dispatch", lambda args: b"$not-a-length\r\n")
+    with pytest.raises(ValueError):
+        backend.get("key")
+    assert backend.pool.idle == []
+
+
+def test_sqlite_counts_concurrent_writes(tmp_path):
+    backend = SQLiteCache(str(tmp_path / "cache.db"))
+    threads = [
+        threading.Thread(target=lambda n=n: [backend.set(f"{n}:{i}", b"x") for i in range(25)])
+        for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert next(backend.writes) == 101
+
+
+def test_redis_unreachable_fails_fast():
+    backend = RedisCache(host="10.255.255.1", port=6379, timeout=0.1)
+    start = time.monotonic()
+    with pytest.raises(OSError):
+        backend.get("key")
+    assert time.monotonic() - start < 1
+
+
+def test_response_cache_skips_dead_backend(redis_server):
+    url = redis_server.url
+    redis_server.stop()
+    cache = ResponseCache(create_backend(url), ttl=60)
+    for _ in range(cache.breaker.failure_threshold):
+        assert cache.get("analyze_emergency", "burn") is None
+    assert not cache.breaker.allow()
+    cache.set("analyze_emergency", "burn", "steps")
+    assert cache.get("analyze_emergency", "burn") is None
+
+
+def test_response_cache_normalizes_queries():
+    cache = ResponseCache(MemoryCache(), ttl=60)
+    cache.set("emergency_videos", "Severe  Burn", [{"video_id": "abc"}])
+    assert cache.get("emergency_videos", "severe burn") == [{"video_id": "abc"}]
+    assert cache.get("remedy_videos", "severe burn") is None
+
+
+def test_create_backend_urls(tmp_path):
+    assert isinstance(create_backend("memory://"), MemoryCache)
+    assert isinstance(create_backend(None), MemoryCache)
+    sqlite = create_backend(f"sqlite:///{tmp_path}/cache.db")
+    assert isinstance(sqlite, SQLiteCache)
+    assert sqlite.path == f"{tmp_path}/cache.db"
+    redis = create_backend("redis://:secret@cache.internal:6380/2")
+    assert isinstance(redis, RedisCache)
+    assert (redis.host, redis.port, redis.db, redis.password) == ("cache.internal", 6380, 2, "secret")
+    redis = create_backend("redis://:p%40ss%3Aw0rd@cache.internal/0")
+    assert redis.password == "p@ss:w0rd"
+    redis = create_backend("redis://localhost")
+    assert (redis.host, redis.port, redis.db) == ("localhost", 6379, 0)
+    with pytest.raises(ValueError):
+        create_backend("memcached://localhost")
@@ -0,0 +1,169 @@
+import json
+import time
+import zlib
+
+import pytest
+
+from offline import HEADER, MAGIC, CircuitBreaker, SnapshotBundle, SnapshotRecorder, admin_token_matches
+
+
+def fail():
+    raise RuntimeError("upstream down")
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+
+def test_breaker_trips_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_trips_on_slow_calls():
+    breaker = CircuitBreaker(failure_threshold=1, latency_limit=0.01, reset_timeout=60)
+    assert breaker.call(lambda: time.sleep(0.02) or "slow") == "slow"
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_half_open_allows_single_trial_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_abandoned_trial_expires():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_breaker_counts_base_exceptions():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(lambda: (_ for _ in ()).throw(KeyboardInterrupt))
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    recorder = SnapshotRecorder()
+    recorder.record("analyze_emergency", "Severe Burn", "**Immediate Steps to Take:**")
+    recorder.record("emergency_videos", "severe burn", [{"title": "Burns", "video_id": "abc"}])
+    path.write_bytes(recorder.export())
+    return path
+
+
+def test_bundle_round_trip(bundle_path):
+    bundle = SnapshotBundle.open(str(bundle_path))
+    assert len(bundle) == 2
+    assert bundle.get("analyze_emergency", "  severe   BURN ") == "**Immediate Steps to Take:**"
+    assert bundle.get("emergency_videos", "Severe burn") == [{"title": "Burns", "video_id": "abc"}]
+    assert bundle.get("analyze_emergency", "fracture") is None
+    assert len(dict(bundle.items())) == 2
+
+
+def test_bundle_missing_file_is_empty(tmp_path):
+    bundle = SnapshotBundle.open(str(tmp_path / "missing.bin"))
+    assert len(bundle) == 0
+    assert bundle.get("analyze_emergency", "burn") is None
+    assert list(bundle.items()) == []
+
+
+@pytest.mark.parametrize("cut", [1, 20])
+def test_truncated_bundle_is_empty(bundle_path, cut):
+    bundle_path.write_bytes(bundle_path.read_bytes()[:-cut])
+    bundle = SnapshotBundle.open(str(bundle_path))
+    assert len(bundle) == 0
+    assert bundle.get("analyze_emergency", "severe burn") is None
+    SnapshotBundle.dumps(dict(bundle.items()))
+
+
+def test_garbage_bundle_is_empty(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(b"not a snapshot at all")
+    assert len(SnapshotBundle.open(str(path))) == 0
+
+
+def test_corrupt_payload_is_a_miss(bundle_path):
+    data = bytearray(bundle_path.read_bytes())
+    data[-5:] = b"\x00" * 5
+    bundle_path.write_bytes(bytes(data))
+    bundle = SnapshotBundle.open(str(bundle_path))
+    assert len(bundle) == 2
+    assert bundle.get("emergency_videos", "severe burn") is None
+    assert [key for key, _ in bundle.items()] == [next(iter(bundle.index))]
+
+
+@pytest.mark.parametrize("index", [
+    {"analyze_emergency\x00burn": [0.0, 3]},
+    {"analyze_emergency\x00burn": [0, 3, 1]},
+    {"analyze_emergency\x00burn": "0,3"},
+    [[0, 3]],
+])
+def test_malformed_index_is_empty(tmp_path, index):
+    header = zlib.compress(json.dumps(index).encode("utf-8"))
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(MAGIC + HEADER.pack(len(header)) + header + zlib.compress(b'"x"'))
+    bundle = SnapshotBundle.open(str(path))
+    assert len(bundle) == 0
+    assert bundle.get("analyze_emergency", "burn") is None
+
+
+@pytest.mark.parametrize("token, expected, matches", [
+    ("s3cret", "s3cret", True),
+    ("s3cret", "other", False),
+    ("", "s3cret", False),
+    ("s3cret", None, False),
+    ("", "", False),
+    ("\u00e9", "s3cret", False),
+    ("p\u00e4ss", "p\u00e4ss", True),
+    ("\ud800", "s3cret", False),
+    (None, "s3cret", False),
+])
+def test_admin_token_matches(token, expected, matches):
+    assert admin_token_matches(token, expected) is matches
+
+
+def test_recorder_keeps_most_requested_within_limit(tmp_path):
+    recorder = SnapshotRecorder(limit=2)
+    for _ in range(3):
+        recorder.record("analyze_emergency", "burn", "burn steps")
+    for i in range(10):
+        recorder.record("analyze_symptoms", f"symptom {i}", "remedy")
+    assert len(recorder.values) <= 4
+    assert set(recorder.counts) == set(recorder.values)
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(recorder.export())
+    bundle = SnapshotBundle.open(str(path))
+    assert len(bundle) == 2
+    assert bundle.get("analyze_emergency", "burn") == "burn steps"